@@ -1,19 +1,117 @@
-from SmartDietAgent.knowledge_base import rules, CATEGORY_PRIORITY, load_foods_csv
-import re
+from SmartDietAgent.knowledge_base import rules, CATEGORY_PRIORITY, get_food_table, rules_version
+import functools
+import heapq
+import itertools
 import json
 import os
-from datetime import datetime
+import time
+from collections import defaultdict
+
+try:  # optional C-accelerated JSON encoder for report export
+    import orjson
+except ImportError:  # pragma: no cover - fallback to stdlib json
+    orjson = None
+
+
+FOODS_CSV_PATH = os.path.join(os.path.dirname(__file__), "data", "foods.csv")
+
+# Process-local sequence appended to report filenames so reports written
+# within the same second don't overwrite each other.
+_REPORT_SEQ = itertools.count()
+# Output directories already created by this process
+_REPORT_DIRS = set()
+
+
+# Suggestions depend only on the (condition, weight_status, diet_pref) triple,
+# a tiny key space, so the rule merge is memoized. `version` is the rule base
+# version and keeps results from going stale after load_additional_rules.
+@functools.lru_cache(maxsize=128)
+def _compute_suggestions(condition, weight_status, diet_pref, version):
+    present = []
+    source_map = defaultdict(set)
+    for category in (condition, weight_status, diet_pref):
+        rtuple = rules.get(category)
+        if rtuple:
+            present.append(rtuple)
+            for s in rtuple:
+                source_map[s].add(category)
+
+    # each category is pre-sorted, so an ordered merge replaces a full sort;
+    # dict.fromkeys drops suggestions shared by several categories
+    suggestions = tuple(dict.fromkeys(heapq.merge(*present)))
+    explanations = tuple((s, tuple(sorted(source_map[s]))) for s in suggestions)
+    return suggestions, explanations
+
+
+# Keyed by the suggestions and only their own explanation categories, so
+# identical profiles share one ranking.
+@functools.lru_cache(maxsize=128)
+def _rank_suggestions(explained, limit):
+    # score each suggestion once; top-k via a heap when a limit is given
+    scored = [
+        (-max((CATEGORY_PRIORITY.get(c, 0) for c in cats), default=0), s)
+        for s, cats in explained
+    ]
+    if limit is not None:
+        return tuple(s for _, s in heapq.nsmallest(limit, scored))
+    return tuple(s for _, s in sorted(scored))
+
+
+def _rank_food_table(table, w_veg, w_diab, w_hyp, goal):
+    """Deduplicated food names ordered by score for one weighting.
+
+    Only a handful of weightings exist, so each ranking is computed once and
+    kept on the table itself; a reloaded CSV brings a fresh table and cache.
+    Name-derived boosts and demotions are already in table["base_score"].
+    """
+    key = (w_veg, w_diab, w_hyp, goal)
+    cached = table["ranked"].get(key)
+    if cached is not None:
+        return cached
+
+    names = table["name"]
+    scores = [
+        base + w_veg * veg + w_diab * diab + w_hyp * hyp + (2 if g == goal else 0)
+        for base, veg, diab, hyp, g in zip(
+            table["base_score"],
+            table["vegetarian"],
+            table["diabetic_friendly"],
+            table["hypertension_friendly"],
+            table["weight_goal"],
+        )
+    ]
+    order = sorted(range(len(names)), key=lambda i: (-scores[i], names[i]))
+    ranked = [i for i in order if scores[i] > 0]
+    # fallback: if strict filter empty, return top general foods
+    if not ranked:
+        ranked = order
+    # dedupe while preserving order, on names lowercased at load time
+    names_lower = table["name_lower"]
+    seen = set()
+    result = []
+    for i in ranked:
+        ln = names_lower[i]
+        if not ln or ln in seen:
+            continue
+        seen.add(ln)
+        result.append(names[i])
+    result = tuple(result)
+    table["ranked"][key] = result
+    return result
 
 
 class SmartDietAgent:
+    __slots__ = ("user_profile", "_rec_cache")
+
     def __init__(self, user_profile):
         """
         user_profile: dictionary with keys like
         'name', 'age', 'weight_status', 'health_condition', 'diet_preference'
         """
         self.user_profile = user_profile
-        # load foods dataset once per instance (cheap for small CSV)
-        self.foods_dataset = None
+        # recommend_foods results keyed by max_items and the profile fields
+        # they depend on, so profile edits never serve stale foods
+        self._rec_cache: dict[tuple, tuple[str, ...]] = {}
 
     # --- BMI utilities ---
     @staticmethod
@@ -37,11 +135,8 @@ class SmartDietAgent:
             return "Normal"
         return "Overweight"
 
-    def infer_diet(self):
-        suggestions = []
-
-        # Using First Order Logic style reasoning
-        # Example: If user is diabetic -> apply diabetic rules
+    def _resolve_profile(self) -> tuple[str, str | None, str | None]:
+        """Return (condition, weight_status, diet_pref), inferring weight status from BMI."""
         condition = self.user_profile.get("health_condition", "Normal")
         weight_status = self.user_profile.get("weight_status", None)
         diet_pref = self.user_profile.get("diet_preference", None)
@@ -57,87 +152,47 @@ class SmartDietAgent:
                 # persist for downstream calls
                 self.user_profile["weight_status"] = inferred
                 self.user_profile["bmi"] = bmi
+        return condition, weight_status, diet_pref
 
-        # Apply health condition rules
-        if condition in rules:
-            suggestions.extend(rules[condition])
-
-        # Apply weight rules
-        if weight_status in rules:
-            suggestions.extend(rules[weight_status])
-
-        # Apply diet preference rules (e.g., Vegetarian)
-        if diet_pref in rules:
-            suggestions.extend(rules[diet_pref])
-
-        # Remove duplicates
-        suggestions = sorted(set(suggestions))
+    def infer_diet(self):
+        suggestions, _ = self.infer_diet_with_explanations()
         return suggestions
 
     def infer_diet_with_explanations(self):
-        suggestions = []
-        source_map = {}
-
-        condition = self.user_profile.get("health_condition", "Normal")
-        weight_status = self.user_profile.get("weight_status", None)
-        diet_pref = self.user_profile.get("diet_preference", None)
-
-        # BMI-based inference when missing
-        if not weight_status:
-            weight = self.user_profile.get("weight_kg")
-            height = self.user_profile.get("height_cm")
-            bmi = self.compute_bmi(weight, height) if (weight and height) else None
-            inferred = self.infer_weight_status_from_bmi(bmi)
-            if inferred:
-                weight_status = inferred
-                self.user_profile["weight_status"] = inferred
-                self.user_profile["bmi"] = bmi
-
-        if condition in rules:
-            for s in rules[condition]:
-                suggestions.append(s)
-                source_map.setdefault(s, set()).add(condition)
-
-        if weight_status in rules:
-            for s in rules[weight_status]:
-                suggestions.append(s)
-                source_map.setdefault(s, set()).add(weight_status)
-
-        if diet_pref in rules:
-            for s in rules[diet_pref]:
-                suggestions.append(s)
-                source_map.setdefault(s, set()).add(diet_pref)
-
-        suggestions = sorted(set(suggestions))
-        explanations = {s: sorted(list(source_map.get(s, []))) for s in suggestions}
-        return suggestions, explanations
+        # Using First Order Logic style reasoning
+        # Example: If user is diabetic -> apply diabetic rules
+        condition, weight_status, diet_pref = self._resolve_profile()
+        suggestions, explained = _compute_suggestions(
+            condition, weight_status, diet_pref, rules_version()
+        )
+        # hand out fresh lists so callers can't mutate the cached result
+        explanations = {s: list(cats) for s, cats in explained}
+        return list(suggestions), explanations
 
     def rank_suggestions(self, suggestions, explanations, limit: int | None = None):
         """Rank by highest category priority, then alpha."""
-        def score(s):
-            cats = explanations.get(s, [])
-            return max((CATEGORY_PRIORITY.get(c, 0) for c in cats), default=0)
-        ranked = sorted(suggestions, key=lambda s: (-score(s), s))
-        if limit is not None:
-            return ranked[:limit]
-        return ranked
+        explained = tuple((s, tuple(explanations.get(s, ()))) for s in suggestions)
+        return list(_rank_suggestions(explained, limit))
 
     # --- Food recommendations from dataset ---
-    def _get_foods_dataset(self):
-        if self.foods_dataset is None:
-            # try local data file
-            csv_path = os.path.join(os.path.dirname(__file__), "data", "foods.csv")
-            self.foods_dataset = load_foods_csv(csv_path)
-        return self.foods_dataset or []
+    def _get_food_table(self):
+        # shared per-process cache; re-parsed only when the CSV changes
+        return get_food_table(FOODS_CSV_PATH)
 
     def recommend_foods(self, max_items: int = 6):
-        foods = self._get_foods_dataset()
-        if not foods:
-            return []
         condition = (self.user_profile.get("health_condition") or "Normal")
         diet_pref = (self.user_profile.get("diet_preference") or "Normal")
         weight_status = self.user_profile.get("weight_status")
 
+        key = (max_items, condition, diet_pref, weight_status)
+        cached = self._rec_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        table = self._get_food_table()
+        if not table["name"]:
+            return []
+
         # Map weight status to goal
         goal = None
         if weight_status == "Overweight":
@@ -147,71 +202,41 @@ class SmartDietAgent:
         else:
             goal = "maintain"
 
-        # preference toward Indian and global staples; demote brand/barcode-like
-        staple_keywords = [
-            "idli","dosa","upma","poha","ragi","roti","chapati","paratha","bajra","jowar","khichdi","dal","rajma","chole","curd","yogurt","sambar","rasam","paneer","palak","bhindi","baingan","sprout","oats","brown rice","millet","quinoa","salad","soup","grilled chicken","tandoori","fish","egg","lentil","lentils","whole wheat","wholegrain","bread","bagel"
-        ]
-        staple_regex = re.compile(r"(" + r"|".join(re.escape(k) for k in staple_keywords) + r")", re.IGNORECASE)
-        barcode_like = re.compile(r"^[0-9\s\-()]+$")
-        size_like = re.compile(r"\b(\d+\s?(ml|l|cl|g|kg))\b", re.IGNORECASE)
-
-        def score(food):
-            name = (food.get("name") or "").strip()
-            s = 0
-            # health alignment
-            if diet_pref == "Vegetarian" and food.get("vegetarian"):
-                s += 2
-            if condition == "Diabetic" and food.get("diabetic_friendly"):
-                s += 3
-            if condition == "Hypertension" and food.get("hypertension_friendly"):
-                s += 3
-            if goal and food.get("weight_goal") == goal:
-                s += 2
-            # food familiarity boost
-            if staple_regex.search(name):
-                s += 3
-            # demotions for low-quality names
-            if barcode_like.match(name):
-                s -= 5
-            if size_like.search(name):
-                s -= 2
-            return s
-
-        ranked = sorted(foods, key=lambda f: (-score(f), f.get("name", "")))
-        names = [f.get("name") for f in ranked if score(f) > 0]
-        # fallback: if strict filter empty, return top general foods
-        if not names:
-            names = [f.get("name") for f in ranked]
-        # final dedupe while preserving order
-        seen = set()
-        result = []
-        for n in names:
-            if not n:
-                continue
-            ln = n.lower()
-            if ln in seen:
-                continue
-            seen.add(ln)
-            result.append(n)
-            if len(result) >= max_items:
-                break
-        return result
-
-    def export_report(self, suggestions, explanations, out_dir="reports"):
-        os.makedirs(out_dir, exist_ok=True)
-        profile = dict(self.user_profile)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # health alignment weights for this profile
+        w_veg = 2 if diet_pref == "Vegetarian" else 0
+        w_diab = 3 if condition == "Diabetic" else 0
+        w_hyp = 3 if condition == "Hypertension" else 0
+        ranked = _rank_food_table(table, w_veg, w_diab, w_hyp, goal)[:max_items]
+        self._rec_cache[key] = ranked
+        return list(ranked)
+
+    def export_report(self, suggestions, explanations, out_dir="reports", pretty: bool = True):
+        if out_dir not in _REPORT_DIRS:
+            os.makedirs(out_dir, exist_ok=True)
+            _REPORT_DIRS.add(out_dir)
+        # serialized immediately below, so no defensive copy is needed
+        profile = self.user_profile
+        ts = time.strftime("%Y%m%d_%H%M%S")
+        seq = next(_REPORT_SEQ)
         name = (profile.get("name") or "user").replace(" ", "_")
-        path = os.path.join(out_dir, f"diet_report_{name}_{ts}.json")
+        path = os.path.join(out_dir, f"diet_report_{name}_{ts}_{seq}.json")
         ranked = self.rank_suggestions(suggestions, explanations)
         data = {
             "profile": profile,
             "ranked_suggestions": [
-                {"suggestion": s, "categories": explanations.get(s, [])}
+                {"suggestion": s, "categories": list(explanations.get(s, []))}
                 for s in ranked
             ],
             "recommended_foods": self.recommend_foods(),
         }
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        else:
+            if pretty:
+                text = json.dumps(data, indent=2, ensure_ascii=False)
+            else:
+                text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            payload = text.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(payload)
         return path
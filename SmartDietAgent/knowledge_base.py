@@ -1,6 +1,10 @@
 import csv
+import io
 import json
 import os
+import re
+import threading
+from bisect import bisect_right
 
 
 # Knowledge Base (FOL rules as dictionary)
@@ -70,6 +74,9 @@ rules = {
         "Stay within fluid limits if prescribed",
     ],
 }
+# Stored as deduplicated, sorted tuples so inference can merge categories in
+# order (heapq.merge) instead of re-sorting on every request.
+rules = {k: tuple(sorted(set(v))) for k, v in rules.items()}
 
 # Category priorities (higher value = higher priority)
 # These help rank suggestions when multiple categories apply
@@ -86,6 +93,33 @@ CATEGORY_PRIORITY = {
     "Normal": 50,
 }
 
+# Food name heuristics: prefer Indian and global staples; demote brand/barcode-like
+STAPLE_KEYWORDS = [
+    "idli","dosa","upma","poha","ragi","roti","chapati","paratha","bajra","jowar","khichdi","dal","rajma","chole","curd","yogurt","sambar","rasam","paneer","palak","bhindi","baingan","sprout","oats","brown rice","millet","quinoa","salad","soup","grilled chicken","tandoori","fish","egg","lentil","lentils","whole wheat","wholegrain","bread","bagel"
+]
+# Patterns are matched against pre-lowercased names (see load_foods_csv), so
+# they are compiled case-sensitively with lowercase literals.
+STAPLE_RE = re.compile(r"(" + r"|".join(re.escape(k) for k in STAPLE_KEYWORDS) + r")")
+# barcode-like names never contain letters and size tokens always do, so the
+# two demotions are mutually exclusive and one scan decides which applies
+NAME_PENALTY_RE = re.compile(
+    r"(?P<barcode>^[0-9\s\-()]+$)|(?P<size>\b\d+\s?(?:ml|l|cl|g|kg)\b)"
+)
+
+# Incremented whenever `rules` is extended so memoized inference can tell
+# that earlier results are stale.
+_RULES_VERSION = 0
+
+
+def _bump_rules_version():
+    global _RULES_VERSION
+    _RULES_VERSION += 1
+
+
+def rules_version() -> int:
+    """Return a counter that changes whenever the rule base is modified."""
+    return _RULES_VERSION
+
 
 def load_additional_rules(json_path: str | None = None):
     """Optionally extend rules from a JSON file with structure {category: [rules...]}."""
@@ -99,14 +133,22 @@ def load_additional_rules(json_path: str | None = None):
                 for key, values in data.items():
                     if not isinstance(values, list):
                         continue
-                    existing = set(rules.get(key, []))
-                    merged = sorted(existing.union(values))
-                    rules[key] = merged
+                    rules[key] = tuple(sorted(set(rules.get(key, ())).union(values)))
+                    _bump_rules_version()
     except Exception:
         # Silently ignore malformed files in production usage; keep core KB
         pass
 
 
+FOOD_COLUMNS = ("name", "vegetarian", "diabetic_friendly", "hypertension_friendly", "weight_goal")
+_TRUE_VALUES = frozenset({"1", "true", "yes", "y"})
+_CSV_BUFFER_SIZE = 1 << 20
+
+
+def _to_bool(val: str) -> bool:
+    return val.strip().lower() in _TRUE_VALUES
+
+
 def load_foods_csv(csv_path: str | None = None):
     """Load a simple foods dataset with boolean diet flags.
 
@@ -121,20 +163,133 @@ def load_foods_csv(csv_path: str | None = None):
     if not csv_path or not os.path.exists(csv_path):
         return foods
     try:
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+        # read in large binary blocks and decode through one wrapper
+        with open(csv_path, "rb", buffering=_CSV_BUFFER_SIZE) as raw, \
+                io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return foods
+            cols = [h.strip().lower() for h in header]
+            # missing columns point one past the header and read as ""
+            idx = [cols.index(c) if c in cols else len(cols) for c in FOOD_COLUMNS]
+            i_name, i_veg, i_diab, i_hyp, i_goal = idx
+            width = max(idx) + 1
             for row in reader:
                 if not row:
                     continue
-                def to_bool(val):
-                    return str(val).strip().lower() in {"1", "true", "yes", "y"}
+                if len(row) < width:
+                    row.extend([""] * (width - len(row)))
+                name = row[i_name].strip()
                 foods.append({
-                    "name": (row.get("name") or "").strip(),
-                    "vegetarian": to_bool(row.get("vegetarian")),
-                    "diabetic_friendly": to_bool(row.get("diabetic_friendly")),
-                    "hypertension_friendly": to_bool(row.get("hypertension_friendly")),
-                    "weight_goal": (row.get("weight_goal") or "").strip().lower(),
+                    "name": name,
+                    "name_lower": name.lower(),
+                    "vegetarian": _to_bool(row[i_veg]),
+                    "diabetic_friendly": _to_bool(row[i_diab]),
+                    "hypertension_friendly": _to_bool(row[i_hyp]),
+                    "weight_goal": row[i_goal].strip().lower(),
                 })
     except Exception:
         return []
     return foods
+
+
+def _batch_search(pattern, names, sep="\x01"):
+    """Per-name booleans for pattern.search using one finditer over all names.
+
+    Names are joined with a separator the pattern cannot match, so the regex
+    engine scans the whole column in a single C-level pass; match offsets are
+    mapped back to rows with bisect.
+    """
+    if not names:
+        return []
+    buf = sep.join(names)
+    if buf.count(sep) != len(names) - 1:
+        # separator occurs inside a name; fall back to per-name search
+        return [bool(pattern.search(n)) for n in names]
+    starts = []
+    pos = 0
+    for n in names:
+        starts.append(pos)
+        pos += len(n) + len(sep)
+    flags = [False] * len(names)
+    for m in pattern.finditer(buf):
+        flags[bisect_right(starts, m.start()) - 1] = True
+    return flags
+
+
+def build_food_table(foods):
+    """Column-oriented view of a foods dataset for fast scoring.
+
+    Each key maps to a list aligned with the input rows. Name heuristics
+    (staple boost, barcode/size demotions) are evaluated once here and summed
+    into ``base_score`` so recommenders only add profile-dependent terms.
+    """
+    names = [f["name"] for f in foods]
+    names_lower = [f["name_lower"] for f in foods]
+    staple = _batch_search(STAPLE_RE, names_lower)
+    penalty = [NAME_PENALTY_RE.search(n) for n in names_lower]
+    barcode = [m is not None and m.lastgroup == "barcode" for m in penalty]
+    size = [m is not None and m.lastgroup == "size" for m in penalty]
+    return {
+        "name": names,
+        "name_lower": names_lower,
+        "vegetarian": [f["vegetarian"] for f in foods],
+        "diabetic_friendly": [f["diabetic_friendly"] for f in foods],
+        "hypertension_friendly": [f["hypertension_friendly"] for f in foods],
+        "weight_goal": [f["weight_goal"] for f in foods],
+        "staple": staple,
+        "barcode": barcode,
+        "size": size,
+        "base_score": [3 * st - 5 * bc - 2 * sz for st, bc, sz in zip(staple, barcode, size)],
+        # memoized rankings keyed by scoring weights, filled by the recommender
+        "ranked": {},
+    }
+
+
+# Parsed foods datasets keyed by (csv_path, mtime); the CSV is read-only at
+# runtime so each file is parsed once per process instead of once per agent.
+_FOODS_CACHE = {}
+# serializes cache misses; hits are plain dict reads and take no lock
+_FOODS_CACHE_LOCK = threading.Lock()
+
+
+def _cached_foods_entry(csv_path: str | None):
+    if not csv_path:
+        return None
+    try:
+        mtime = os.path.getmtime(csv_path)
+    except OSError:
+        return None
+    key = (csv_path, mtime)
+    entry = _FOODS_CACHE.get(key)
+    if entry is None:
+        with _FOODS_CACHE_LOCK:
+            # another thread may have loaded it while we waited
+            entry = _FOODS_CACHE.get(key)
+            if entry is None:
+                foods = load_foods_csv(csv_path)
+                entry = {"foods": foods, "table": build_food_table(foods)}
+                # drop stale entries for the same path
+                for stale in [k for k in list(_FOODS_CACHE) if k[0] == csv_path]:
+                    _FOODS_CACHE.pop(stale, None)
+                _FOODS_CACHE[key] = entry
+    return entry
+
+
+def get_foods(csv_path: str | None = None):
+    """Return the foods dataset for csv_path, parsing it only when it changed."""
+    entry = _cached_foods_entry(csv_path)
+    return entry["foods"] if entry else []
+
+
+def get_food_table(csv_path: str | None = None):
+    """Return the cached column-oriented table (see build_food_table) for csv_path."""
+    entry = _cached_foods_entry(csv_path)
+    return entry["table"] if entry else build_food_table([])
+
+
+def reload_foods():
+    """Invalidate cached foods datasets so the next lookup re-reads the CSV."""
+    with _FOODS_CACHE_LOCK:
+        _FOODS_CACHE.clear()
@@ -1,4 +1,3 @@
-from SmartDietAgent.agent import SmartDietAgent
 import argparse
 import sys
 
@@ -101,6 +100,9 @@ def run():
         user_profile["weight_kg"] = weight_kg
         user_profile["height_cm"] = height_cm
 
+    # imported lazily so --help and argument errors skip loading the agent
+    from SmartDietAgent.agent import SmartDietAgent
+
     agent = SmartDietAgent(user_profile)
     suggestions, explanations = agent.infer_diet_with_explanations()
 
@@ -1,11 +1,28 @@
 import csv
 import json
 import os
+import itertools
 import sys
-from typing import Dict, Any, Iterable
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List
 import re
 
 import requests
+import urllib3
+
+try:  # optional incremental JSON parser; avoids materializing whole pages
+    import ijson
+except ImportError:  # pragma: no cover - fall back to resp.json()
+    ijson = None
+
+
+# Errors worth retrying. When streaming, a dropped connection surfaces while
+# reading resp.raw as a urllib3 error, and a truncated body as an ijson error.
+RETRY_EXCEPTIONS = (requests.RequestException,)
+if ijson is not None:
+    RETRY_EXCEPTIONS += (urllib3.exceptions.HTTPError, ijson.JSONError)
 
 
 OFF_SEARCH_URL = (
@@ -25,13 +42,46 @@ FIELDS = [
 ]
 
 
-def fetch_off_products(page_size: int = 250, pages: int = 20) -> Iterable[Dict[str, Any]]:
+def _fetch_page(session: requests.Session, params: Dict[str, Any], stop: threading.Event, retries: int = 3) -> List[Dict[str, Any]]:
+    """GET one search page, retrying HTTP/network errors with exponential backoff.
+
+    When ijson is installed the response is streamed and products are parsed
+    incrementally; otherwise the page is decoded with resp.json().
+    Gives up early once `stop` is set by a consumer that no longer needs pages.
+    """
+    delay = 1.0
+    for attempt in range(retries):
+        if stop.is_set():
+            return []
+        try:
+            with session.get(OFF_SEARCH_URL, params=params, timeout=30, stream=ijson is not None) as resp:
+                resp.raise_for_status()
+                if ijson is not None:
+                    # parse products as bytes arrive instead of building the full page tree
+                    resp.raw.decode_content = True
+                    return list(ijson.items(resp.raw, "products.item"))
+                data = resp.json()
+                return data.get("products") or []
+        except RETRY_EXCEPTIONS:
+            if attempt == retries - 1 or stop.wait(delay):
+                return []
+            delay *= 2
+        except Exception:
+            return []
+    return []
+
+
+def fetch_off_products(page_size: int = 250, pages: int = 20, max_workers: int = 8) -> Iterable[Dict[str, Any]]:
+    # requests.Session is safe to share for concurrent GETs (pooled connections)
     session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
     # two passes: strict (nutrition-facts-completed) then broad
     strategies = [
         {"label": "en:nutrition-facts-completed"},
         None,
     ]
+    tasks = []
     for strategy in strategies:
         for page in range(1, pages + 1):
             params = {
@@ -48,15 +98,31 @@ def fetch_off_products(page_size: int = 250, pages: int = 20) -> Iterable[Dict[s
                     "tag_contains_0": "contains",
                     "tag_0": strategy["label"],
                 })
-            try:
-                resp = session.get(OFF_SEARCH_URL, params=params, timeout=30)
-                resp.raise_for_status()
-                data = resp.json()
-                products = data.get("products") or []
-                for p in products:
-                    yield p
-            except Exception:
-                continue
+            tasks.append(params)
+
+    # pages are fetched concurrently but yielded in task order so strict
+    # results still come first. At most max_workers pages are outstanding, so
+    # a consumer that stops early (build_csv after min_rows) leaves few
+    # requests behind; those skip their retries once `stop` is set.
+    stop = threading.Event()
+    pending = iter(tasks)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = deque(
+            executor.submit(_fetch_page, session, params, stop)
+            for params in itertools.islice(pending, max_workers)
+        )
+        while futures:
+            # pop before yielding so consumed pages can be freed
+            products = futures.popleft().result()
+            # top up the window so the next pages load while this one is consumed
+            for params in itertools.islice(pending, 1):
+                futures.append(executor.submit(_fetch_page, session, params, stop))
+            for p in products:
+                yield p
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def normalize_name(p: Dict[str, Any]) -> str:
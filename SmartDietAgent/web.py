@@ -1,8 +1,70 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from flask import Flask, render_template, request
-from SmartDietAgent.agent import SmartDietAgent
+from SmartDietAgent.agent import SmartDietAgent, FOODS_CSV_PATH
+from SmartDietAgent.knowledge_base import rules_version
+
+try:  # optional gzip/Brotli compression of responses
+    from flask_compress import Compress
+except ImportError:  # pragma: no cover - serve uncompressed
+    Compress = None
 
 
 app = Flask(__name__)
+if Compress is not None:
+    app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    Compress(app)
+
+# /suggest output is deterministic for a given profile, so results are cached
+# per profile key (the user's name is substituted at render time).
+RESULT_CACHE_MAXSIZE = 512
+RESULT_CACHE_TTL = 300  # seconds
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _result_cache_lock:
+        entry = _result_cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del _result_cache[key]
+            return None
+        _result_cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key, value):
+    with _result_cache_lock:
+        _result_cache[key] = (time.monotonic() + RESULT_CACHE_TTL, value)
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > RESULT_CACHE_MAXSIZE:
+            _result_cache.popitem(last=False)
+
+
+def _profile_key(user_profile):
+    """Everything the agent's output depends on: profile fields, BMI and data versions."""
+    weight_status = user_profile.get("weight_status")
+    bmi = None
+    if not weight_status and user_profile.get("weight_kg") and user_profile.get("height_cm"):
+        bmi = SmartDietAgent.compute_bmi(user_profile["weight_kg"], user_profile["height_cm"])
+    try:
+        foods_mtime = os.path.getmtime(FOODS_CSV_PATH)
+    except OSError:
+        foods_mtime = None
+    return (
+        weight_status,
+        user_profile.get("health_condition"),
+        user_profile.get("diet_preference"),
+        bmi,
+        foods_mtime,
+        rules_version(),
+    )
 
 
 @app.get("/")
@@ -51,13 +113,19 @@ def suggest():
         user_profile["weight_kg"] = weight_kg
         user_profile["height_cm"] = height_cm
 
-    agent = SmartDietAgent(user_profile)
-    suggestions, explanations = agent.infer_diet_with_explanations()
-    ranked = agent.rank_suggestions(suggestions, explanations)
+    key = _profile_key(user_profile)
+    cached = _cache_get(key)
+    if cached is None:
+        agent = SmartDietAgent(user_profile)
+        suggestions, explanations = agent.infer_diet_with_explanations()
+        ranked = agent.rank_suggestions(suggestions, explanations)
 
-    bmi = agent.user_profile.get("bmi")
-    inferred_weight_status = agent.user_profile.get("weight_status")
-    recommended_foods = agent.recommend_foods()
+        bmi = agent.user_profile.get("bmi")
+        inferred_weight_status = agent.user_profile.get("weight_status")
+        recommended_foods = agent.recommend_foods()
+        cached = (ranked, explanations, bmi, inferred_weight_status, recommended_foods)
+        _cache_put(key, cached)
+    ranked, explanations, bmi, inferred_weight_status, recommended_foods = cached
 
     return render_template(
         "results.html",
@@ -71,7 +139,8 @@ def suggest():
 
 
 if __name__ == "__main__":
-    # Run Flask dev server
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    # Run Flask dev server (set FLASK_DEBUG=1 for the debugger/reloader);
+    # use wsgi.py with gunicorn in production
+    app.run(host="127.0.0.1", port=5000, debug=os.environ.get("FLASK_DEBUG") == "1")
 
 
@@ -0,0 +1,9 @@
+"""WSGI entrypoint for production servers.
+
+Run from the repository root, e.g.:
+    gunicorn -w 4 -k gthread --threads 2 SmartDietAgent.wsgi:app
+"""
+from SmartDietAgent.web import app
+
+
+__all__ = ["app"]